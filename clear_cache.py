@@ -1,17 +1,21 @@
 import os
 import shutil
 
-def clear_python_cache(directory):
-    for root, dirs, files in os.walk(directory):
-        if '__pycache__' in dirs:
-            cache_path = os.path.join(root, '__pycache__')
-            print(f"Deleting: {cache_path}")
-            shutil.rmtree(cache_path)
-        for file in files:
-            if file.endswith('.pyc'):
-                pyc_path = os.path.join(root, file)
-                print(f"Deleting: {pyc_path}")
-                os.remove(pyc_path)
+def clear_python_cache(directory, verbose=False):
+    # scandir hands back the entry type without an extra stat per file, and
+    # __pycache__ folders already hold every .pyc, so loose files are not checked
+    stack = [directory]
+    while stack:
+        with os.scandir(stack.pop()) as entries:
+            for entry in entries:
+                if not entry.is_dir(follow_symlinks=False):
+                    continue
+                if entry.name == '__pycache__':
+                    if verbose:
+                        print(f"Deleting: {entry.path}")
+                    shutil.rmtree(entry.path)
+                else:
+                    stack.append(entry.path)
 
 # Example usage: clear cache in the current directory
 clear_python_cache('.')
\ No newline at end of file
@@ -1,8 +1,47 @@
-import json
+import os
+import re
+import asyncio
 import logging
+from contextlib import closing
+from functools import lru_cache
 from core.base.base_agent import BaseAgent
 from core.client.pdf_reader import PDF_Reader
 from core.base.base_prompt import BasePrompt
+from core.helper import fastjson
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# Token budget of the CV text sent to the LLM, later pages are dropped
+MAX_CV_TOKENS = int(os.environ.get("MAX_CV_TOKENS", 12000))
+# CVs with less text than this (empty or failed OCR) are not sent to the LLM
+MIN_CV_CHARS = int(os.environ.get("MIN_CV_CHARS", 200))
+
+# JSON blob of the LLM response, a ```json fenced block is preferred over any
+# other fence. The closing fence is optional, some replies omit it.
+_JSON_FENCE = re.compile(r"```json\s*(.*?)\s*(?:```|\Z)", re.IGNORECASE | re.DOTALL)
+_FENCE = re.compile(r"```\s*(.*?)\s*(?:```|\Z)", re.DOTALL)
+
+@lru_cache(maxsize=1)
+def _get_encoding():
+    """tiktoken encoding, loaded on first use since loading it may download the BPE file"""
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.get_encoding('cl100k_base')
+    except Exception as e:
+        logging.warning(f"tiktoken encoding unavailable ({e}), token counts are estimated")
+        return None
+
+def count_tokens(text:str):
+    encoding = _get_encoding()
+    if encoding is None:
+        # Rough estimate for English text
+        return len(text) // 4
+    # CV text is data, special token markup in it is counted as plain text
+    return len(encoding.encode_ordinary(text))
 
 class InformationExtractPrompt(BasePrompt):
     """Prompt to extract information from text"""
@@ -10,24 +49,79 @@ class InformationExtractPrompt(BasePrompt):
 
 class CV_Reader_Agent(BaseAgent):
     
-    def parse_into_json(self, llm_response:str, separator:str='```JSON'):
-        if not (len(llm_response.split(separator)) > 1):
-            separator = separator.lower()
-        if separator in llm_response and len(llm_response.split(separator)) > 1:
-            llm_response = llm_response.split(separator)[1]
-        json_data = llm_response.split('```')[0]
-            
-        return json.loads(json_data)
+    def parse_into_json(self, llm_response:str):
+        match = _JSON_FENCE.search(llm_response) or _FENCE.search(llm_response)
+        json_data = match.group(1) if match else llm_response
+        return fastjson.loads(json_data)
     
-    def get_information_extraction_from_llm(self, prompt):
+    def get_information_extraction_from_llm(self, prompt, cv_content=None):
         logging.info(f'Using Prompt:\n{prompt}')
-        llm_response = self.llm.chat_completion(prompt)
+        llm_response = self.llm.chat_completion(prompt, semantic_key=cv_content, validate=self.parse_into_json)
         json_data = self.parse_into_json(llm_response)
         logging.info(f'CV JSON Data: \n{json_data}')
         return json_data
     
+    async def aget_information_extraction_from_llm(self, prompt, cv_content=None, async_client=None):
+        logging.info(f'Using Prompt:\n{prompt}')
+        llm_response = await self.llm.achat_completion(
+            prompt, semantic_key=cv_content, async_client=async_client, validate=self.parse_into_json
+        )
+        json_data = self.parse_into_json(llm_response)
+        logging.info(f'CV JSON Data: \n{json_data}')
+        return json_data
+    
+    def read_cv_content(self, filepath, max_tokens=MAX_CV_TOKENS):
+        """Collect the CV pages, stopping once the token budget is spent"""
+        pages = []
+        tokens = 0
+        # Closed on break so the pages read so far are cached right away
+        with closing(PDF_Reader.iter_pages(filepath)) as page_iter:
+            for page in page_iter:
+                tokens += count_tokens(page)
+                if pages and tokens > max_tokens:
+                    logging.warning(f'{filepath} exceeds {max_tokens} tokens, remaining pages are skipped')
+                    break
+                pages.append(page)
+        
+        cv_content = "\n".join(pages)
+        logging.info(f'text extracted from pdf: \n\n{cv_content}')
+        return cv_content
+    
+    def has_enough_content(self, filepath, cv_content):
+        content_length = len(cv_content.strip())
+        if content_length < MIN_CV_CHARS:
+            logging.warning(f'{filepath} has only {content_length} characters of text, skipping LLM call')
+            return False
+        return True
+    
     def get_information_from_CV(self, filepath):
-        cv_content = PDF_Reader.extract_text_from_pdf(filepath)
+        cv_content = self.read_cv_content(filepath)
+        if not self.has_enough_content(filepath, cv_content):
+            return {}
         prompt = InformationExtractPrompt(cv_content=cv_content).to_string()
-        json_data = self.get_information_extraction_from_llm(prompt)
-        return json_data
\ No newline at end of file
+        json_data = self.get_information_extraction_from_llm(prompt, cv_content)
+        return json_data
+    
+    async def aget_information_from_CV(self, filepath, async_client=None):
+        # PDF parsing / OCR is blocking, keep it off the event loop
+        cv_content = await asyncio.to_thread(self.read_cv_content, filepath)
+        if not self.has_enough_content(filepath, cv_content):
+            return {}
+        prompt = InformationExtractPrompt(cv_content=cv_content).to_string()
+        json_data = await self.aget_information_extraction_from_llm(prompt, cv_content, async_client)
+        return json_data
+    
+    async def process_batch(self, filepaths, concurrency=8, return_exceptions=False):
+        """Extract information from many CVs, running at most `concurrency` at a time"""
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        # One client per batch, its connections belong to this event loop and are closed with the batch
+        async with self.llm.create_async_client() as async_client:
+            async def extract(filepath):
+                async with semaphore:
+                    return await self.aget_information_from_CV(filepath, async_client)
+            
+            return await asyncio.gather(
+                *(extract(filepath) for filepath in filepaths),
+                return_exceptions=return_exceptions
+            )
\ No newline at end of file
@@ -4,6 +4,41 @@ from ..helper.logger import Logger
 from ..client.llm_client import OpenAIClient
 # from ..client.document_intelligence_client import AzDocumentIntelligenceClient
 
+DANGEROUS_MODULES = [
+    " os",
+    " io",
+    ".os",
+    ".io",
+    "'os'",
+    "'io'",
+    '"os"',
+    '"io"',
+    "chr(",
+    "chr)",
+    "chr ",
+    "(chr",
+    "b64decode",
+]
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+
+def _build_automaton(keywords):
+    """Compile keywords into an Aho-Corasick automaton matching all of them in one pass"""
+    if ahocorasick is None:
+        return None
+    automaton = ahocorasick.Automaton()
+    for keyword in keywords:
+        automaton.add_word(keyword, keyword)
+    automaton.make_automaton()
+    return automaton
+
+
+_DANGEROUS_MODULES_AUTOMATON = _build_automaton(DANGEROUS_MODULES)
+
 class BaseAgent:
     """
     Base Agent class to improve the conversational experience
@@ -49,22 +84,9 @@ class BaseAgent:
         pass
 
     def check_malicious_keywords_in_query(self, query):
-        dangerous_modules = [
-            " os",
-            " io",
-            ".os",
-            ".io",
-            "'os'",
-            "'io'",
-            '"os"',
-            '"io"',
-            "chr(",
-            "chr)",
-            "chr ",
-            "(chr",
-            "b64decode",
-        ]
-        return any(module in query for module in dangerous_modules)
+        if _DANGEROUS_MODULES_AUTOMATON is not None:
+            return next(_DANGEROUS_MODULES_AUTOMATON.iter(query), None) is not None
+        return any(module in query for module in DANGEROUS_MODULES)
 
     def assign_prompt_id(self):
         """Assign a prompt ID"""
@@ -13,14 +13,19 @@ Example:
     ```
 """
 import os
+import asyncio
 import openai
 
 from abc import abstractmethod
 from packaging.version import parse
 from importlib.metadata import version
 from typing import TYPE_CHECKING, Any, Dict, Mapping, Optional, Tuple, Union, Callable
+from ..cache.llm_cache import LLMCache
 from ..helper.error_exception.error_exception import NoCodeFoundError, MethodNotImplementedError
 
+if TYPE_CHECKING:
+    from ..cache.semantic_cache import SemanticLLMCache
+
 class APIKeyNotFoundError(Exception):
     """
     Raised when the API key is not defined/declared.
@@ -99,6 +104,14 @@ class BaseOpenAI(LLM):
     # Configure a custom httpx client. See the
     # [httpx documentation](https://www.python-httpx.org/api/#client) for more details.
     http_client: Union[Any, None] = None
+    # Returns a new httpx.AsyncClient for each async client. An async pool is
+    # bound to the event loop it first runs on, so it cannot be shared like `http_client`.
+    async_http_client_factory: Union[Callable[[], Any], None] = None
+    # Shared response cache, only consulted for deterministic (temperature=0) calls
+    cache: Optional["LLMCache"] = None
+    cache_ttl: Optional[int] = 86400
+    # Consulted after an exact cache miss, for calls given a `semantic_key`
+    semantic_cache: Optional["SemanticLLMCache"] = None
     client: Any
     _is_chat_model: bool
 
@@ -166,25 +179,81 @@ class BaseOpenAI(LLM):
 
     @property
     def _client_params(self) -> Dict[str, any]:
-        return {
+        client_params = {
             "api_key": self.api_token,
             "base_url": self.api_base,
-            "timeout": self.request_timeout,
             "max_retries": self.max_retries,
             "default_headers": self.default_headers,
             "default_query": self.default_query,
             "http_client": self.http_client,
         }
+        # openai reads an explicit None as "no timeout", which would also
+        # override the timeout configured on `http_client`
+        if self.request_timeout is not None:
+            client_params["timeout"] = self.request_timeout
+        return client_params
+
+    def _cache_key(self, messages: list) -> str:
+        """Build the response cache key of a request."""
+        return LLMCache.make_key(
+            {
+                "d": getattr(self, "deployment_name", None),
+                "p": self._default_params,
+                "m": messages,
+            }
+        )
 
-    def chat_completion(self, value: str) -> str:
+    def _get_cached(self, messages: list, semantic_key: Optional[str] = None) -> Optional[str]:
+        """Look a deterministic request up in the exact, then the semantic cache."""
+        if self.temperature != 0:
+            return None
+        if self.cache is not None:
+            cached = self.cache.get(self._cache_key(messages))
+            if cached is not None:
+                return cached
+        if self.semantic_cache is not None and semantic_key is not None:
+            return self.semantic_cache.get(semantic_key, namespace=self._cache_key([]))
+        return None
+
+    def _set_cached(self, messages: list, content: Optional[str], semantic_key: Optional[str] = None):
+        """Store the response of a deterministic request in the caches."""
+        if self.temperature != 0 or content is None:
+            return
+        if self.cache is not None:
+            self.cache.set(self._cache_key(messages), content, ttl=self.cache_ttl)
+        if self.semantic_cache is not None and semantic_key is not None:
+            self.semantic_cache.set(semantic_key, content, namespace=self._cache_key([]))
+
+    async def _aget_cached(self, messages: list, semantic_key: Optional[str] = None) -> Optional[str]:
+        """`_get_cached` with the semantic lookup, which embeds the text, run off the event loop."""
+        cached = self._get_cached(messages)
+        if cached is not None or self.temperature != 0:
+            return cached
+        if self.semantic_cache is not None and semantic_key is not None:
+            return await asyncio.to_thread(
+                self.semantic_cache.get, semantic_key, namespace=self._cache_key([])
+            )
+        return None
+
+    async def _aset_cached(self, messages: list, content: Optional[str], semantic_key: Optional[str] = None):
+        """`_set_cached` with the semantic insert, which embeds the text, run off the event loop."""
+        self._set_cached(messages, content)
+        if self.temperature != 0 or content is None:
+            return
+        if self.semantic_cache is not None and semantic_key is not None:
+            await asyncio.to_thread(
+                self.semantic_cache.set, semantic_key, content, namespace=self._cache_key([])
+            )
+
+    def _chat_params(self, value: str) -> Dict[str, Any]:
         """
-        Query the chat completion API
+        Build the chat completion request for a prompt
 
         Args:
             value (str): Prompt
 
         Returns:
-            str: LLM response.
+            dict: Parameters to pass to the client.
 
         """
         messages = []
@@ -205,9 +274,120 @@ class BaseOpenAI(LLM):
         if self.stop is not None:
             params["stop"] = [self.stop]
 
+        return params
+
+    def chat_completion(
+        self,
+        value: str,
+        semantic_key: Optional[str] = None,
+        validate: Optional[Callable[[str], Any]] = None,
+    ) -> str:
+        """
+        Query the chat completion API
+
+        Args:
+            value (str): Prompt
+            semantic_key (str): Variable part of the prompt (e.g. the CV text)
+                used to look up near duplicate requests. Optional.
+            validate (Callable): Called on the response before it is cached,
+                a response it raises on is not cached. Optional.
+
+        Returns:
+            str: LLM response.
+
+        """
+        params = self._chat_params(value)
+
+        cached = self._get_cached(params["messages"], semantic_key)
+        if cached is not None:
+            return cached
+
         response = self.client.create(**params)
+        content = response.choices[0].message.content
 
-        return response.choices[0].message.content
+        # A reply cut at max_tokens or rejected by `validate` would be served
+        # again on every retry
+        if response.choices[0].finish_reason == "stop":
+            if validate is not None:
+                validate(content)
+            self._set_cached(params["messages"], content, semantic_key)
+
+        return content
+
+    @property
+    def _async_client_params(self) -> Dict[str, any]:
+        http_client = (
+            self.async_http_client_factory()
+            if self.async_http_client_factory is not None
+            else None
+        )
+        return {**self._client_params, "http_client": http_client}
+
+    def create_async_client(self) -> Any:
+        """
+        Create an async client for the running event loop
+
+        Use it as `async with llm.create_async_client() as client:` so its
+        connections are closed before the loop is.
+
+        Returns:
+            openai.AsyncOpenAI: Client to pass to `achat_completion`.
+
+        """
+        if not is_openai_v1():
+            raise MethodNotImplementedError(
+                "Async chat completion requires openai>=1.0.0"
+            )
+        return openai.AsyncOpenAI(**self._async_client_params)
+
+    def _async_completions(self, async_client: Any) -> Any:
+        return async_client.chat.completions
+
+    async def achat_completion(
+        self,
+        value: str,
+        semantic_key: Optional[str] = None,
+        async_client: Any = None,
+        validate: Optional[Callable[[str], Any]] = None,
+    ) -> str:
+        """
+        Query the chat completion API without blocking the event loop
+
+        Args:
+            value (str): Prompt
+            semantic_key (str): Variable part of the prompt (e.g. the CV text)
+                used to look up near duplicate requests. Optional.
+            async_client (openai.AsyncOpenAI): Client from `create_async_client`,
+                shared by the calls of a batch. A short-lived one is created
+                when not given.
+            validate (Callable): Called on the response before it is cached,
+                a response it raises on is not cached. Optional.
+
+        Returns:
+            str: LLM response.
+
+        """
+        if async_client is None:
+            async with self.create_async_client() as async_client:
+                return await self.achat_completion(value, semantic_key, async_client, validate)
+
+        params = self._chat_params(value)
+
+        cached = await self._aget_cached(params["messages"], semantic_key)
+        if cached is not None:
+            return cached
+
+        response = await self._async_completions(async_client).create(**params)
+        content = response.choices[0].message.content
+
+        # A reply cut at max_tokens or rejected by `validate` would be served
+        # again on every retry
+        if response.choices[0].finish_reason == "stop":
+            if validate is not None:
+                validate(content)
+            await self._aset_cached(params["messages"], content, semantic_key)
+
+        return content
 
 
 class AzureOpenAI(BaseOpenAI):
@@ -265,7 +445,9 @@ class AzureOpenAI(BaseOpenAI):
             deployment_name (str): Custom name of the deployed model
             is_chat_model (bool): Whether ``deployment_name`` corresponds to a Chat
                 or a Completion model.
-            **kwargs: Inference Parameters.
+            **kwargs: Inference Parameters, plus the optional `http_client`
+                (httpx.Client) connection pool and `async_http_client_factory`
+                (callable returning a new httpx.AsyncClient).
         """
 
         self.api_token = (
@@ -312,6 +494,8 @@ class AzureOpenAI(BaseOpenAI):
         self.openai_proxy = kwargs.get("openai_proxy") or os.getenv("OPENAI_PROXY")
         if self.openai_proxy:
             openai.proxy = {"http": self.openai_proxy, "https": self.openai_proxy}
+        self.http_client = kwargs.get("http_client")
+        self.async_http_client_factory = kwargs.get("async_http_client_factory")
 
         self._set_params(**kwargs)
         # set the client
@@ -365,6 +549,14 @@ class AzureOpenAI(BaseOpenAI):
         }
         return {**client_params, **super()._client_params}
 
+    def create_async_client(self) -> Any:
+        if not is_openai_v1():
+            return super().create_async_client()
+        return openai.AsyncAzureOpenAI(**self._async_client_params)
+
+    def _async_completions(self, async_client: Any) -> Any:
+        return async_client.chat.completions if self._is_chat_model else async_client.completions
+
     @property
     def type(self) -> str:
         return "azure-openai"
@@ -4,10 +4,27 @@ In order to better handle the instructions, this prompt module is written.
 
 import os
 import re
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional
 
-from jinja2 import Environment, FileSystemLoader
+from jinja2 import Environment, FileSystemLoader, Template
+
+
+@lru_cache(maxsize=None)
+def _compile_template(template: str) -> Template:
+    """Compile an inline template once per process."""
+    return Environment().from_string(template)
+
+
+@lru_cache(maxsize=None)
+def _load_template(template_path: str) -> Template:
+    """Read and compile a template file once per process."""
+    # find path to template file
+    current_dir_path = Path(__file__).parent
+    path_to_template = os.path.join(current_dir_path, "templates")
+    env = Environment(loader=FileSystemLoader(path_to_template))
+    return env.get_template(template_path)
 
 
 class BasePrompt:
@@ -24,14 +41,9 @@ class BasePrompt:
         self.props = kwargs
 
         if self.template:
-            env = Environment()
-            self.prompt = env.from_string(self.template)
+            self.prompt = _compile_template(self.template)
         elif self.template_path:
-            # find path to template file
-            current_dir_path = Path(__file__).parent
-            path_to_template = os.path.join(current_dir_path, "templates")
-            env = Environment(loader=FileSystemLoader(path_to_template))
-            self.prompt = env.get_template(self.template_path)
+            self.prompt = _load_template(self.template_path)
 
         self._resolved_prompt = None
 
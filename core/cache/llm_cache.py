@@ -0,0 +1,128 @@
+""" Response cache for LLM calls
+
+Deterministic completions (temperature=0) are cached so that re-processing
+the same CV does not hit the LLM endpoint again. Lookups go through a small
+in-process LRU first and then through an optional persistent backend. The same
+cache stores the pages extracted from PDFs by `PDF_Reader`, so values are any
+picklable object rather than only response strings.
+
+Example:
+
+    ```
+    cache = LLMCache.from_directory(".cache/llm")
+    key = LLMCache.make_key({"d": deployment_name, "p": params, "m": messages})
+    if cache.get(key) is None:
+        cache.set(key, content, ttl=86400)
+    ```
+"""
+import time
+import hashlib
+import logging
+import threading
+
+from collections import OrderedDict
+from typing import Any, Optional, Protocol, Tuple
+from ..helper import fastjson
+
+try:
+    import diskcache
+except ImportError:
+    diskcache = None
+
+
+class CacheBackend(Protocol):
+    """Persistent storage used behind the in-process LRU of `LLMCache`."""
+
+    def get(self, key: str) -> Optional[Tuple[Any, Optional[float]]]:
+        """Return `(value, expire_at)` for `key`, or None on a miss."""
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        """Store `value` under `key`, expiring after `ttl` seconds if given."""
+
+
+class DiskCacheBackend:
+    """`CacheBackend` storing entries in a SQLite backed `diskcache.Cache`."""
+
+    def __init__(self, directory: str):
+        if diskcache is None:
+            raise ImportError(
+                "diskcache is required for DiskCacheBackend. "
+                "Please install it with `pip install diskcache`"
+            )
+        self._cache = diskcache.Cache(directory)
+
+    def get(self, key: str) -> Optional[Tuple[Any, Optional[float]]]:
+        value, expire_at = self._cache.get(key, expire_time=True)
+        if value is None:
+            return None
+        return value, expire_at
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        self._cache.set(key, value, expire=ttl)
+
+
+class LLMCache:
+    """Two level (in-process LRU + persistent backend) cache of LLM responses and PDF pages."""
+
+    def __init__(self, backend: Optional[CacheBackend] = None, maxsize: int = 1024):
+        """
+        Args:
+            backend (CacheBackend): Persistent storage. Memory only if None.
+            maxsize (int): Number of entries kept in the in-process LRU.
+        """
+        self.backend = backend
+        self.maxsize = maxsize
+        self._lru: "OrderedDict[str, Tuple[Any, Optional[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_directory(cls, directory: Optional[str], maxsize: int = 1024) -> "LLMCache":
+        """
+        Build a cache persisted in `directory`.
+
+        Falls back to a memory only cache when `directory` is empty or
+        diskcache is not installed.
+        """
+        backend = None
+        if directory:
+            try:
+                backend = DiskCacheBackend(directory)
+            except ImportError as e:
+                logging.warning(f"{e}. Entries are cached in memory only.")
+        return cls(backend=backend, maxsize=maxsize)
+
+    @staticmethod
+    def make_key(payload: Any) -> str:
+        """Return the sha256 hex digest of the JSON encoded `payload`."""
+        return hashlib.sha256(fastjson.dumps_bytes(payload, sort_keys=True)).hexdigest()
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._lru.get(key)
+            if entry is not None:
+                value, expire_at = entry
+                if expire_at is None or expire_at > time.time():
+                    self._lru.move_to_end(key)
+                    return value
+                del self._lru[key]
+
+        if self.backend is None:
+            return None
+        entry = self.backend.get(key)
+        if entry is None:
+            return None
+        self._remember(key, *entry)
+        return entry[0]
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
+        expire_at = time.time() + ttl if ttl is not None else None
+        self._remember(key, value, expire_at)
+        if self.backend is not None:
+            self.backend.set(key, value, ttl=ttl)
+
+    def _remember(self, key: str, value: Any, expire_at: Optional[float]) -> None:
+        with self._lock:
+            self._lru[key] = (value, expire_at)
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.maxsize:
+                self._lru.popitem(last=False)
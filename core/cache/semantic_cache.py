@@ -0,0 +1,120 @@
+""" Semantic cache for LLM calls
+
+Near duplicate inputs (e.g. a CV re-submitted with light edits or different
+whitespace) miss the exact-match `LLMCache`. This cache embeds the input with
+a local sentence-transformer and returns the stored response of a previous
+input that is a near duplicate of it.
+
+The input is embedded in word windows, since the model truncates long texts.
+The mean of the window embeddings only shortlists candidates: pooling pulls
+different CVs sharing the same layout closer together, so a pooled similarity
+says little about the content. A candidate is served only when it has as many
+windows as the input and every aligned pair of windows reaches `threshold` on
+its own, the single passage setting the default of 0.98 was chosen for. A
+false hit would hand out another candidate's personal data, so near misses
+are always treated as misses.
+
+Example:
+
+    ```
+    cache = SemanticLLMCache(threshold=0.98)
+    cache.set(cv_content, llm_response, namespace=params_key)
+    cache.get(edited_cv_content, namespace=params_key)
+    ```
+"""
+import threading
+
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import hnswlib
+    import numpy as np
+    from sentence_transformers import SentenceTransformer
+except ImportError:
+    hnswlib = None
+
+
+class SemanticLLMCache:
+    """Nearest neighbour cache of LLM responses keyed by text embeddings."""
+
+    def __init__(
+        self,
+        model_name: str = "all-MiniLM-L6-v2",
+        dim: int = 384,
+        threshold: float = 0.98,
+        max_elements: int = 10_000,
+        window_words: int = 150,
+        candidates: int = 8,
+    ):
+        """
+        Args:
+            model_name (str): sentence-transformers model used for embeddings.
+            dim (int): Embedding size of `model_name`.
+            threshold (float): Minimum cosine similarity of every aligned
+                window pair for a hit.
+            max_elements (int): Capacity of the index of each namespace.
+            window_words (int): Words per embedded window, kept below the
+                sequence length the model truncates at.
+            candidates (int): Nearest pooled vectors checked window by window.
+        """
+        if hnswlib is None:
+            raise ImportError(
+                "hnswlib and sentence-transformers are required for SemanticLLMCache. "
+                "Please install them with `pip install hnswlib sentence-transformers`"
+            )
+        self.dim = dim
+        self.threshold = threshold
+        self.max_elements = max_elements
+        self.window_words = window_words
+        self.candidates = candidates
+        self.embed = SentenceTransformer(model_name)
+        # namespace -> (index, label -> (window embeddings, response)), one
+        # index per namespace so neighbours from other namespaces never hide a hit
+        self._namespaces: Dict[str, Tuple["hnswlib.Index", Dict[int, Tuple["np.ndarray", str]]]] = {}
+        self._lock = threading.Lock()
+
+    def _encode(self, text: str) -> Tuple["np.ndarray", "np.ndarray"]:
+        """Return the normalized window embeddings of `text` and their normalized mean."""
+        words = text.split()
+        windows: List[str] = [
+            " ".join(words[i : i + self.window_words])
+            for i in range(0, len(words), self.window_words)
+        ] or [""]
+        vectors = self.embed.encode(windows, normalize_embeddings=True)
+        pooled = vectors.mean(axis=0)
+        return vectors, pooled / max(np.linalg.norm(pooled), 1e-12)
+
+    def _is_near_duplicate(self, vectors: "np.ndarray", cached_vectors: "np.ndarray") -> bool:
+        if len(vectors) != len(cached_vectors):
+            return False
+        return float((vectors * cached_vectors).sum(axis=1).min()) >= self.threshold
+
+    def get(self, text: str, namespace: str = "") -> Optional[str]:
+        """Return the response cached for a near duplicate of `text` in `namespace`."""
+        if namespace not in self._namespaces:
+            return None
+        vectors, pooled = self._encode(text)
+        with self._lock:
+            index, store = self._namespaces[namespace]
+            labels, _ = index.knn_query(pooled, k=min(self.candidates, len(store)))
+            candidates = [store[int(label)] for label in labels[0]]
+
+        for cached_vectors, response in candidates:
+            if self._is_near_duplicate(vectors, cached_vectors):
+                return response
+        return None
+
+    def set(self, text: str, value: str, namespace: str = "") -> None:
+        """Cache `value` as the response for `text` in `namespace`."""
+        vectors, pooled = self._encode(text)
+        with self._lock:
+            if namespace not in self._namespaces:
+                index = hnswlib.Index(space="cosine", dim=self.dim)
+                index.init_index(max_elements=self.max_elements)
+                self._namespaces[namespace] = (index, {})
+            index, store = self._namespaces[namespace]
+            if len(store) >= self.max_elements:
+                return
+            label = len(store)
+            index.add_items(pooled, [label])
+            store[label] = (vectors, value)
@@ -1,7 +1,7 @@
 import io
 import os
 import logging
-import heapq
+import threading
 import fitz
 
 from azure.core.credentials import AzureKeyCredential
@@ -10,12 +10,14 @@ from azure.ai.documentintelligence import DocumentIntelligenceClient
 
 logger = logging.getLogger("ragapp")
 
-MIN_WORD_THRESHOLD = os.environ.get("MIN_WORD_THRESHOLD", 1)
+MIN_WORD_THRESHOLD = int(os.environ.get("MIN_WORD_THRESHOLD", 1))
 DOCUMENT_INTELLIGENCE_KEY=os.environ.get("DOCUMENT_INTELLIGENCE_KEY")
 DOCUMENT_INTELLIGENCE_ENDPOINT=os.environ.get("DOCUMENT_INTELLIGENCE_ENDPOINT")
 DOCUMENT_INTELLIGENCE_API_VERSION=os.environ.get("DOCUMENT_INTELLIGENCE_API_VERSION", "2024-02-29-preview")
 api_version="2024-02-29-preview"
 
+_lock = threading.Lock()
+
 def table_to_markdown(table):
     markdown = ""
     # Extract headers
@@ -28,23 +30,6 @@ def table_to_markdown(table):
         markdown += "| " + " | ".join(row) + " |\n"
     return markdown
 
-class PriorityQueue:
-    def __init__(self):
-        self._queue = []
-
-    def push(self, priority, item):
-        # Push an item with its priority into the queue
-        # The priority queue uses a tuple where the first element is the priority
-        # By using -priority, we can turn heapq into a max-heap instead of a min-heap
-        heapq.heappush(self._queue, (priority, item))
-        
-    def is_empty(self):
-        return len(self._queue) == 0
-
-    def pop(self):
-        # Pop the item with the highest priority
-        return heapq.heappop(self._queue)[-1]
-
 class AzDocumentIntelligenceClient:
     document_intelligence_client = None
 
@@ -53,54 +38,54 @@ class AzDocumentIntelligenceClient:
             DOCUMENT_INTELLIGENCE_ENDPOINT=DOCUMENT_INTELLIGENCE_ENDPOINT, 
             DOCUMENT_INTELLIGENCE_KEY=DOCUMENT_INTELLIGENCE_KEY,
             DOCUMENT_INTELLIGENCE_API_VERSION=DOCUMENT_INTELLIGENCE_API_VERSION):
-        if not cls.document_intelligence_client:
-            cls.document_intelligence_client = DocumentIntelligenceClient(
-                endpoint=DOCUMENT_INTELLIGENCE_ENDPOINT, 
-                credential=AzureKeyCredential(DOCUMENT_INTELLIGENCE_KEY), 
-                api_version=DOCUMENT_INTELLIGENCE_API_VERSION
-            )
+        # Double-checked so concurrent first calls build a single client
+        if cls.document_intelligence_client is None:
+            with _lock:
+                if cls.document_intelligence_client is None:
+                    cls.document_intelligence_client = DocumentIntelligenceClient(
+                        endpoint=DOCUMENT_INTELLIGENCE_ENDPOINT, 
+                        credential=AzureKeyCredential(DOCUMENT_INTELLIGENCE_KEY), 
+                        api_version=DOCUMENT_INTELLIGENCE_API_VERSION
+                    )
         return cls.document_intelligence_client
 
 def OCR_text_from_pdf(pdfBytes, pages):
     document_analysis_client = AzDocumentIntelligenceClient.create_document_intelligence_client()
+    pdfBytes.seek(0)
     poller = document_analysis_client.begin_analyze_document(
         "prebuilt-layout", analyze_request=io.BufferedReader(pdfBytes), content_type="application/octet-stream", pages=pages
     )
     result: AnalyzeResult = poller.result()
-    result_string = ""
-    pq = PriorityQueue()
+    # (offset, text) pairs, sorted once so the output follows the reading order
+    items: list[tuple[int, str]] = []
+
+    # Paragraphs repeating a table cell are dropped, the table is rendered as a whole
+    table_cells = {cell.content for table in result.tables for cell in table.cells}
 
     for paragraph in result.paragraphs:
         content = paragraph.content
-        check = False
-        for table in result.tables:
-            if any(content == cell.content for cell in table.cells):
-                check = True
-                break
-        if not check and paragraph.role != 'pageNumber' and len(content.split(' ')) > MIN_WORD_THRESHOLD:
-            pq.push(paragraph.spans[0].offset, content)
+        if content not in table_cells and paragraph.role != 'pageNumber' and len(content.split(' ')) > MIN_WORD_THRESHOLD:
+            items.append((paragraph.spans[0].offset, content))
         
     for table in result.tables:
         table_string = table_to_markdown(table)
-        pq.push(table.spans[0].offset, table_string)
-        
-    while not pq.is_empty():
-        items = pq.pop()
-        result_string += items + "\n"
-    return result_string
+        items.append((table.spans[0].offset, table_string))
+
+    items.sort(key=lambda item: item[0])
+    return "".join(text + "\n" for _, text in items)
 
 
 def analyze_document(pdfBytes, file_type = 'pdf'):
     pdfBytes.seek(0)
     if file_type == 'docx':
         return OCR_text_from_pdf(pdfBytes, None)
-    document = fitz.open(stream=pdfBytes, filetype="pdf")  
-    num_pages = document.page_count  
-    page = 1
-    result_string = ""
-    while page < num_pages:
-        pages= f"{page}-{page+1999}"
-        result_string += OCR_text_from_pdf(pdfBytes, pages)
-        page += 2000
+    # Read the document once, every page window gets its own stream over the same bytes
+    raw = pdfBytes.read()
+    with fitz.open(stream=raw, filetype="pdf") as document:
+        num_pages = document.page_count
+    parts: list[str] = []
+    for start in range(1, num_pages + 1, 2000):
+        pages = f"{start}-{min(start + 1999, num_pages)}"
+        parts.append(OCR_text_from_pdf(io.BytesIO(raw), pages))
     
-    return result_string
\ No newline at end of file
+    return "".join(parts)
\ No newline at end of file
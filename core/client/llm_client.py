@@ -1,5 +1,8 @@
 import os
-from ..base.base_llm import AzureOpenAI
+import httpx
+import threading
+from ..base.base_llm import AzureOpenAI, BaseOpenAI
+from ..cache.llm_cache import LLMCache
 
 AZURE_OPENAI_KEY = os.environ.get("AZURE_OPENAI_KEY")
 AZURE_OPENAI_ENDPOINT=os.environ.get("AZURE_OPENAI_ENDPOINT")
@@ -7,6 +10,28 @@ AZURE_OPENAI_API_VERSION=os.environ.get("AZURE_OPENAI_API_VERSION")
 AZURE_OPENAI_DEPLOYMENT_NAME=os.environ.get("AZURE_OPENAI_DEPLOYMENT_NAME")
 AZURE_OPENAI_TEMPERATURE = os.environ.get("AZURE_OPENAI_TEMPERATURE", 0)
 AZURE_OPENAI_TOP_P = os.environ.get("AZURE_OPENAI_TOP_P", 1.0)
+LLM_CACHE_DIR = os.environ.get("LLM_CACHE_DIR", ".cache/llm")
+LLM_SEMANTIC_CACHE = os.environ.get("LLM_SEMANTIC_CACHE", "false").lower() == "true"
+LLM_SEMANTIC_CACHE_THRESHOLD = float(os.environ.get("LLM_SEMANTIC_CACHE_THRESHOLD", 0.98))
+LLM_HTTP_MAX_CONNECTIONS = int(os.environ.get("LLM_HTTP_MAX_CONNECTIONS", 64))
+LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.environ.get("LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS", 32))
+LLM_HTTP_TIMEOUT = float(os.environ.get("LLM_HTTP_TIMEOUT", 60.0))
+
+_lock = threading.Lock()
+
+def _http_pool_params():
+    # Sized pools reused by every agent, so TLS/TCP setup is paid once per connection
+    return {
+        "limits": httpx.Limits(
+            max_connections=LLM_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=LLM_HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        ),
+        "timeout": httpx.Timeout(LLM_HTTP_TIMEOUT),
+    }
+
+def _create_async_http_client():
+    # A new pool per async client, each one lives on a single event loop
+    return httpx.AsyncClient(**_http_pool_params())
 
 class OpenAIClient:
     pandas_openai_chat_client = None
@@ -22,15 +47,26 @@ class OpenAIClient:
             presence_penalty = 0,
             max_tokens = 1500,
             is_chat_model = True):
-        if not cls.pandas_openai_chat_client:
-            cls.pandas_openai_chat_client = AzureOpenAI(
-                api_token = api_token,
-                azure_endpoint = azure_endpoint,
-                api_version = api_version,
-                deployment_name = deployment_name,
-                temperature = float(temperature),
-                presence_penalty = presence_penalty,
-                top_p = float(top_p),
-                max_tokens = max_tokens,
-                is_chat_model = is_chat_model)
+        # Double-checked so concurrent first calls build a single client and HTTP pool
+        if cls.pandas_openai_chat_client is None:
+            with _lock:
+                if BaseOpenAI.cache is None:
+                    BaseOpenAI.cache = LLMCache.from_directory(LLM_CACHE_DIR)
+                if LLM_SEMANTIC_CACHE and BaseOpenAI.semantic_cache is None:
+                    # Imported here, the embedding model is only loaded when enabled
+                    from ..cache.semantic_cache import SemanticLLMCache
+                    BaseOpenAI.semantic_cache = SemanticLLMCache(threshold=LLM_SEMANTIC_CACHE_THRESHOLD)
+                if cls.pandas_openai_chat_client is None:
+                    cls.pandas_openai_chat_client = AzureOpenAI(
+                        api_token = api_token,
+                        azure_endpoint = azure_endpoint,
+                        api_version = api_version,
+                        deployment_name = deployment_name,
+                        temperature = float(temperature),
+                        presence_penalty = presence_penalty,
+                        top_p = float(top_p),
+                        max_tokens = max_tokens,
+                        is_chat_model = is_chat_model,
+                        http_client = httpx.Client(**_http_pool_params()),
+                        async_http_client_factory = _create_async_http_client)
         return cls.pandas_openai_chat_client
@@ -1,62 +1,259 @@
-import PyPDF2
+import io
+import os
+import hashlib
+import threading
+import multiprocessing
 import pytesseract
 import re
+from functools import lru_cache, partial
+from PIL import Image
 from pdf2image import convert_from_path
-import pytesseract
+from concurrent.futures import ProcessPoolExecutor
 import logging
+from itertools import islice
+from ..cache.llm_cache import LLMCache
+
+PDF_CACHE_DIR = os.environ.get("PDF_CACHE_DIR", ".cache/pdf_text")
+
+# pdfium (C++) is several times faster than the pure Python PyPDF2, which is
+# kept as a fallback backend
+try:
+    import pypdfium2 as pdfium
+except ImportError:
+    pdfium = None
+
+# pdfium must not be called from two threads at once, even on different
+# documents, and CVs are read from worker threads by `process_batch`
+_PDFIUM_LOCK = threading.Lock()
+
+try:
+    import PyPDF2
+except ImportError:
+    PyPDF2 = None
+
+_ALNUM = re.compile(r'[A-Za-z0-9]')
+# Every byte but [A-Za-z0-9], deleting them leaves only the ASCII alphanumerics
+_NON_ALNUM = bytes(c for c in range(256) if not (chr(c).isascii() and chr(c).isalnum()))
+_ALNUM_PROBE = 256
+
+def _has_alnum(text):
+    """Tell whether text holds any ASCII alphanumeric character"""
+    # Real text has a match within its first characters, where the regex stops
+    # early. Long runs without any (scanned pages, OCR noise) are cheaper to
+    # clear with a byte table deletion than with the regex engine.
+    if _ALNUM.search(text, 0, _ALNUM_PROBE):
+        return True
+    return bool(text[_ALNUM_PROBE:].encode('ascii', 'ignore').translate(None, _NON_ALNUM))
+
+@lru_cache(maxsize=4096)
+def _file_digest(path, size, mtime_ns):
+    """sha256 of a file, memoised on its stat so unchanged files are hashed once"""
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def _ocr_one(img_bytes, lang=None, config=''):
+    """OCR a single PNG encoded page, run inside a worker process"""
+    return pytesseract.image_to_string(Image.open(io.BytesIO(img_bytes)), lang=lang, config=config)
+
+_ocr_executor = None
+_ocr_executor_lock = threading.Lock()
+# pdftoppm already spreads a document over `ocr_thread_count` threads, so
+# documents are rasterized one at a time
+_rasterize_lock = threading.Lock()
+
+def _get_ocr_executor():
+    """Process pool shared by every OCR call, sized to the core count"""
+    global _ocr_executor
+    if _ocr_executor is None:
+        with _ocr_executor_lock:
+            if _ocr_executor is None:
+                # Forking a process that runs reader threads can deadlock the children
+                _ocr_executor = ProcessPoolExecutor(
+                    max_workers=os.cpu_count() or 1,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+    return _ocr_executor
 
 class PDF_Reader:
-    
+    # Rasterization, typed CV text reads fine at 150 DPI in grayscale
+    ocr_dpi = 150
+    ocr_grayscale = True
+    ocr_thread_count = os.cpu_count() or 1
+    # Tesseract, LSTM engine only. Callers with single column CVs can add
+    # '--psm 6' to skip page layout analysis.
+    ocr_lang = 'eng'
+    ocr_config = '--oem 1'
+    # Extracted pages keyed by the sha256 of the PDF and the extraction
+    # settings, created on first use. Bump the version when extraction changes.
+    text_cache = None
+    text_cache_version = 1
+    text_cache_ttl = 7 * 86400
+    _text_cache_lock = threading.Lock()
+
     @classmethod
-    def is_digital_pdf(self, filepath):
-        try:
+    def get_text_cache(self):
+        if self.text_cache is None:
+            with self._text_cache_lock:
+                if self.text_cache is None:
+                    PDF_Reader.text_cache = LLMCache.from_directory(PDF_CACHE_DIR)
+        return self.text_cache
+
+    @classmethod
+    def text_cache_key(self, filepath):
+        """Cache key of the pages of filepath, changing with the file, the text backend or the OCR settings"""
+        stat = os.stat(filepath)
+        return LLMCache.make_key({
+            "v": self.text_cache_version,
+            "f": _file_digest(os.path.abspath(filepath), stat.st_size, stat.st_mtime_ns),
+            "b": "pdfium" if pdfium is not None else "PyPDF2",
+            "ocr": [self.ocr_dpi, self.ocr_grayscale, self.ocr_lang, self.ocr_config],
+        })
+
+    @classmethod
+    def iter_text_layer(self, filepath):
+        """Yield the text layer of each page, opening the document only once"""
+        if pdfium is not None:
+            # The lock is held per pdfium call, never across a yield
+            with _PDFIUM_LOCK:
+                pdf = pdfium.PdfDocument(filepath)
+                num_pages = len(pdf)
+            try:
+                for i in range(num_pages):
+                    with _PDFIUM_LOCK:
+                        page = pdf[i]
+                        textpage = page.get_textpage()
+                        text = textpage.get_text_range()
+                        textpage.close()
+                        page.close()
+                    yield text.replace('\r\n', '\n')
+            finally:
+                with _PDFIUM_LOCK:
+                    pdf.close()
+        elif PyPDF2 is not None:
             with open(filepath, 'rb') as f:
                 reader = PyPDF2.PdfReader(f)
-                pages = len(reader.pages)
-                for page in range(pages):
-                    page = reader.pages[page]
-                    text = page.extract_text()
-                    if text:
-                        if re.search(r'[a-zA-Z0-9]', text):
-                            return True
-                    else:
-                        return False
+                for page in reader.pages:
+                    yield page.extract_text() or ""
+        else:
+            raise ImportError(
+                "pypdfium2 or PyPDF2 is required to read PDFs. "
+                "Please install it with `pip install pypdfium2`"
+            )
+
+    @classmethod
+    def read_text_layer(self, filepath):
+        """Extract the text layer in a single pass, flagging whether it holds any alphanumeric character"""
+        extracted_text = []
+        has_alnum = False
+
+        for text in self.iter_text_layer(filepath):
+            if not has_alnum:
+                has_alnum = _has_alnum(text)
+            extracted_text.append(text)
+
+        return "\n".join(extracted_text), has_alnum
+
+    @classmethod
+    def is_digital_pdf(self, filepath):
+        try:
+            return self.read_text_layer(filepath)[1]
         except Exception as e:
             logging.error(e)
             return None
-    
+
+    @classmethod
+    def iter_ocr_pages(self, filepath):
+        """Yield the OCR text of each page, in page order"""
+        with _rasterize_lock:
+            pages = convert_from_path(
+                filepath,
+                dpi=self.ocr_dpi,
+                grayscale=self.ocr_grayscale,
+                thread_count=self.ocr_thread_count
+            )
+
+        # Tesseract is single threaded, so fan the pages out over the cores.
+        # The pool is shared, which keeps concurrent CVs within the core count.
+        # Pages are shipped as PNG bytes since PIL images pickle poorly.
+        images = []
+        for page in pages:
+            buffer = io.BytesIO()
+            page.save(buffer, format='PNG')
+            images.append(buffer.getvalue())
+
+        ocr_page = partial(_ocr_one, lang=self.ocr_lang, config=self.ocr_config)
+        executor = _get_ocr_executor()
+        futures = [executor.submit(ocr_page, image) for image in images]
+        try:
+            for future in futures:
+                yield future.result()
+        finally:
+            # Pages not yet started are dropped when the consumer stops early
+            for future in futures:
+                future.cancel()
+
     @classmethod
     def ocr(self, filepath):
-        pages = convert_from_path(filepath)
-        extracted_text = []
-        for i, page in enumerate(pages):
-            text = pytesseract.image_to_string(page)
-            extracted_text.append(text)
-        
-        full_text = "\n".join(extracted_text)
+        full_text = "\n".join(self.iter_ocr_pages(filepath))
         return full_text
-    
+
     @classmethod
     def read_digital_pdf(self, filepath):
-        with open(filepath, 'rb') as f:
-            reader = PyPDF2.PdfReader(f)
-            pages = len(reader.pages)
-            extracted_text = []
-            
-            for page in range(pages):
-                page = reader.pages[page]
-                text = page.extract_text()
-                extracted_text.append(text)
-            
-            full_text = "\n".join(extracted_text)
-        return full_text
-    
+        return self.read_text_layer(filepath)[0]
+
+    @classmethod
+    def iter_pages(self, filepath):
+        """Yield the text of each page, served from the text cache when the same PDF was read before"""
+        key = self.text_cache_key(filepath)
+        cache = self.get_text_cache()
+
+        # Entries are (pages, complete), a consumer stopping early (e.g. on
+        # the token budget) leaves the prefix it read
+        pages, complete = cache.get(key) or ((), False)
+        yield from pages
+        if complete:
+            return
+
+        # The cached prefix is re-extracted but not yielded again
+        pages = list(pages)
+        cached_count = len(pages)
+        try:
+            for text in islice(self.extract_pages(filepath), cached_count, None):
+                pages.append(text)
+                yield text
+            complete = True
+        finally:
+            if complete or len(pages) > cached_count:
+                cache.set(key, (tuple(pages), complete), ttl=self.text_cache_ttl)
+
+    @classmethod
+    def extract_pages(self, filepath):
+        """Yield the text of each page, falling back to OCR when the PDF has no usable text layer"""
+        # Pages are held back until one has an alphanumeric character, from
+        # then on the text layer is streamed as it is read
+        pending = []
+        has_alnum = False
+        try:
+            for text in self.iter_text_layer(filepath):
+                if has_alnum:
+                    yield text
+                    continue
+                pending.append(text)
+                if _has_alnum(text):
+                    has_alnum = True
+                    yield from pending
+                    pending = []
+        except Exception as e:
+            if has_alnum:
+                raise
+            logging.error(e)
+
+        if not has_alnum:
+            yield from self.iter_ocr_pages(filepath)
+
     @classmethod
     def extract_text_from_pdf(self, filepath):
-        if self.is_digital_pdf(filepath):
-            full_text =  self.read_digital_pdf(filepath)
-        else:
-            full_text =  self.ocr(filepath)
-        
+        full_text = "\n".join(self.iter_pages(filepath))
+
         logging.info(f'text extracted from pdf: \n\n{full_text}')
         return full_text
@@ -0,0 +1,38 @@
+"""
+JSON helpers
+
+Thin wrapper preferring orjson (C extension) and falling back to the stdlib
+json module when it is not installed.
+
+Example:
+    ```python
+    from core.helper import fastjson
+
+    data = fastjson.loads('{"Name": "Micheal Richard"}')
+    key = hashlib.sha256(fastjson.dumps_bytes(data, sort_keys=True)).hexdigest()
+    ```
+"""
+
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+    import json
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    """Parse a JSON document"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps_bytes(obj: Any, sort_keys: bool = False) -> bytes:
+    """Serialize `obj` to compact UTF-8 encoded JSON"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS if sort_keys else 0)
+    return json.dumps(
+        obj, sort_keys=sort_keys, separators=(",", ":"), ensure_ascii=False
+    ).encode()